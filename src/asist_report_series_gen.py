@@ -1,43 +1,65 @@
-import glob
-from datetime import datetime
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 
 import json
 from src.components.speech.trial import Trial
 from src.components.speech.vocalics_aggregator import VocalicsAggregator
 from src.components.speech.vocalics_writer import VocalicsWriter
 
-if __name__ == "__main__":
+TRIAL_NUMBER_REGEX = re.compile(r"Trial-(T\d+)")
 
-    # Trials for which we have vocalics.
-    trials = ["T000745", "T000746", "T000837", "T000838", "T000843", "T000844", "T000847", "T000848"]
 
-    for trial_number in trials:
-        for metadata_path in glob.glob(f"../data/asist/study3/metadata/*Trial-{trial_number}*.metadata"):
-            if "Terminated" in metadata_path:
-                continue
+def serialize_trial(metadata_path: str):
+    trial = Trial(metadata_path, database="asist_vocalics")
+
+    vocalics_component = VocalicsAggregator(trial.utterances_per_subject).split(
+        VocalicsAggregator.SplitMethod.TRUNCATE_CURRENT)
+
+    time_steps = int((trial.mission_end - trial.mission_start).total_seconds())
+    vocalics_writer = VocalicsWriter()
 
-            trial = Trial(metadata_path, database="asist_vocalics")
+    vocalics_writer.write(f"../data/asist/study3/series/{trial.number}", vocalics_component,
+                          trial.mission_start, time_steps)
 
-            vocalics_component = VocalicsAggregator(trial.utterances_per_subject).split(
-                VocalicsAggregator.SplitMethod.TRUNCATE_CURRENT)
+    trial_info = {
+        "id": trial.id,
+        "trial_start": trial.trial_start.strftime("%Y-%m-%d %H:%M:%S.%fZ"),
+        "trial_end": trial.trial_end.strftime("%Y-%m-%d %H:%M:%S.%fZ"),
+        "mission_start": trial.mission_start.strftime("%Y-%m-%d %H:%M:%S.%fZ"),
+        "mission_end": trial.mission_end.strftime("%Y-%m-%d %H:%M:%S.%fZ"),
+        "team_score": trial.team_score
+    }
 
-            time_steps = int((trial.mission_end - trial.mission_start).total_seconds())
-            vocalics_writer = VocalicsWriter()
+    with open(f"../data/asist/study3/series/{trial.number}/trial_info.json", "w") as f:
+        json.dump(trial_info, f, indent=4, sort_keys=True)
 
-            vocalics_writer.write(f"../data/asist/study3/series/{trial.number}", vocalics_component,
-                                  trial.mission_start, time_steps)
 
-            trial_info = {
-                "id": trial.id,
-                "trial_start": trial.trial_start.strftime("%Y-%m-%d %H:%M:%S.%fZ"),
-                "trial_end": trial.trial_end.strftime("%Y-%m-%d %H:%M:%S.%fZ"),
-                "mission_start": trial.mission_start.strftime("%Y-%m-%d %H:%M:%S.%fZ"),
-                "mission_end": trial.mission_end.strftime("%Y-%m-%d %H:%M:%S.%fZ"),
-                "team_score": trial.team_score
-            }
+if __name__ == "__main__":
 
-            with open(f"../data/asist/study3/series/{trial.number}/trial_info.json", "w") as f:
-                json.dump(trial_info, f, indent=4, sort_keys=True)
+    # Trials for which we have vocalics.
+    trials = {"T000745", "T000746", "T000837", "T000838", "T000843", "T000844", "T000847", "T000848"}
 
+    # The metadata directory is listed once and filtered by trial number instead of being globbed once per trial.
+    # Trials are written to a directory named after their number, so we keep a single metadata file per trial.
+    # Otherwise, two processes would write to the same directory at the same time.
+    metadata_path_per_trial = {}
+    with os.scandir("../data/asist/study3/metadata") as entries:
+        for entry in sorted(entries, key=lambda e: e.name):
+            if not entry.name.endswith(".metadata") or "Terminated" in entry.name or not entry.is_file():
+                continue
+
+            match = TRIAL_NUMBER_REGEX.search(entry.name)
+            if match is None or match.group(1) not in trials:
+                continue
 
+            trial_number = match.group(1)
+            if trial_number in metadata_path_per_trial:
+                print(f"[WARN] Multiple metadata files for trial {trial_number}. Using {entry.name} instead of " +
+                      f"{os.path.basename(metadata_path_per_trial[trial_number])}.")
+            metadata_path_per_trial[trial_number] = entry.path
 
+    # Trials are parsed, read from the database and written independently of each other. Each process opens its own
+    # database connection when the trial reads its vocalics.
+    with ProcessPoolExecutor() as executor:
+        list(executor.map(serialize_trial, metadata_path_per_trial.values()))
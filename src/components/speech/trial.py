@@ -1,6 +1,6 @@
 import json
+from bisect import bisect_left, bisect_right
 from typing import Any, Dict, List
-from datetime import datetime
 
 from dateutil.parser import parse
 from src.components.speech.common import Utterance
@@ -166,33 +166,26 @@ class Trial:
                 continue
 
             vocalics = vocalics_per_subject[vocalics_subject_callsign_to_id[subject_callsign]]
+            # Vocalics are sorted by timestamp, so we can binary search the boundaries of each utterance. Utterances of
+            # a subject might overlap, so each search covers the full list of vocalics.
+            vocalics_timestamps = [vocalic.timestamp for vocalic in vocalics]
 
             for utterance in self.utterances_per_subject[subject_callsign]:
-                num_measurements = 0
-
-                # reset the vocalics index here just in case there are overlapping utterances for a subject
-                v = 0
-
-                sum_vocalic_features: Dict[str, float] = {}
-
-                # Find start index of vocalic features that matches the start of an utterance
-                while v < len(vocalics) and vocalics[v].timestamp < utterance.start:
-                    v += 1
-
                 # Collect vocalic features within an utterance
-                while v < len(vocalics) and vocalics[v].timestamp <= utterance.end:
-                    utterance.vocalic_series.append(vocalics[v])
+                v_start = bisect_left(vocalics_timestamps, utterance.start)
+                v_end = bisect_right(vocalics_timestamps, utterance.end, lo=v_start)
+                utterance.vocalic_series.extend(vocalics[v_start:v_end])
+                num_measurements = v_end - v_start
 
-                    # Accumulate vocalic features to average later
-                    for feature_name, feature_value in vocalics[v].features.items():
+                # Accumulate vocalic features to average later
+                sum_vocalic_features: Dict[str, float] = {}
+                for vocalic in vocalics[v_start:v_end]:
+                    for feature_name, feature_value in vocalic.features.items():
                         if feature_name not in sum_vocalic_features:
                             sum_vocalic_features[feature_name] = 0.0
 
                         sum_vocalic_features[feature_name] += feature_value
 
-                    num_measurements += 1
-                    v += 1
-
                 # Compute average vocalics
                 if num_measurements > 0:
                     for name, value in sum_vocalic_features.items():
@@ -200,7 +193,6 @@ class Trial:
                                                            float(num_measurements)
 
                 if num_measurements == 0:
-                    subject_callsign = self.subject_id_to_color[subject_id]
                     print(
                         "[WARN] No vocalic features detected for utterance between " +
                         f"{utterance.start.isoformat()} and {utterance.end.isoformat()}" +
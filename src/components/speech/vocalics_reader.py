@@ -1,6 +1,10 @@
-from datetime import datetime
+import os
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import psycopg2
 from dateutil.parser import parse
 from tqdm import tqdm
@@ -18,6 +22,15 @@ class VocalicsReader:
     }
 
     LEN_TIMESTAMP_STRING = 30
+    TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+    # Timestamps in the database have a fixed format in UTC with nanoseconds (e.g. 2022-03-29T16:07:52.123456789Z).
+    # Datetime only supports microseconds, so only the first 6 digits of the fraction are captured.
+    TIMESTAMP_REGEX = re.compile(r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{1,6})\d*Z")
+
+    # Open connections per (process, server, port, database). Each trial creates its own reader, so connections are
+    # shared at the class level to avoid a new handshake with the database for every trial in the same process. The
+    # process id is part of the key because a connection must not be used by a forked process.
+    _connections: Dict[Tuple[int, str, int, str], Any] = {}
 
     def __init__(self,
                  server: str = "localhost",
@@ -46,8 +59,46 @@ class VocalicsReader:
         Returns:
             Dict[str, List[Vocalics]]: dictionary of vocalics, with subject id as key
         """
+        try:
+            records, earliest_timestamp = self._read_records(trial_id, feature_names, initial_timestamp,
+                                                             final_timestamp, start_timestamp is not None)
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # The server might have dropped the cached connection. In that case, the query fails with an
+            # OperationalError, or with an InterfaceError when the transaction is rolled back on the closed connection.
+            # We discard the connection and try once more with a new one.
+            self.close()
+            records, earliest_timestamp = self._read_records(trial_id, feature_names, initial_timestamp,
+                                                             final_timestamp, start_timestamp is not None)
+
+        timestamp_offset = None
+        if start_timestamp is not None:
+            # identify earliest vocalics timestamp
+            earliest_vocalics_timestamp = VocalicsReader._parse_timestamps([earliest_timestamp])[0]
+            timestamp_offset = start_timestamp - earliest_vocalics_timestamp
+
+        # create vocalics objects
         vocalics_per_subject = {}
+        timestamps = VocalicsReader._parse_timestamps([record[1] for record in records])
+        pbar = tqdm(total=len(records))
+        for (player_id, _, *features_record), timestamp in zip(records, timestamps):
+            if timestamp_offset is not None:
+                timestamp += timestamp_offset
+
+            # Features come in the same order as feature_names
+            feature_map = dict(zip(feature_names, features_record))
+            vocalics_per_subject.setdefault(player_id, []).append(Vocalics(timestamp, feature_map))
+            pbar.update()
+
+        # The query orders the records by participant and timestamp, so the vocalics of each subject are already sorted
+        return vocalics_per_subject
 
+    def _read_records(self,
+                      trial_id: str,
+                      feature_names: List[str],
+                      initial_timestamp: Optional[datetime],
+                      final_timestamp: Optional[datetime],
+                      read_earliest_timestamp: bool) -> Tuple[List[Tuple[Any]], Optional[str]]:
+        earliest_timestamp = None
         with self._connect() as connection:
             if initial_timestamp is None or final_timestamp is None:
                 records = VocalicsReader._read_features(
@@ -60,40 +111,51 @@ class VocalicsReader:
                     initial_timestamp,
                     final_timestamp)
 
-            timestamp_offset = None
-            if start_timestamp is not None:
-                # identify earliest vocalics timestamp
-                earliest_vocalics_timestamp = parse(VocalicsReader._read_earliest_timestamp(connection, trial_id))
-                timestamp_offset = start_timestamp - earliest_vocalics_timestamp
-
-            # create vocalics objects
-            pbar = tqdm(total=len(records))
-            for player_id, timestamp_str, *features_record in records:
-                timestamp = parse(timestamp_str)
-                if timestamp_offset is not None:
-                    timestamp += timestamp_offset
-
-                feature_map = {}
-                for i, feature_name in enumerate(feature_names):
-                    feature_map[feature_name] = features_record[i]
-
-                if player_id not in vocalics_per_subject:
-                    vocalics_per_subject[player_id] = [
-                        Vocalics(timestamp, feature_map)]
-                else:
-                    vocalics_per_subject[player_id].append(
-                        Vocalics(timestamp, feature_map))
-                pbar.update()
-
-        # Sort the vocalics
-        for subject_id in vocalics_per_subject.keys():
-            vocalics_per_subject[subject_id] = sorted(
-                vocalics_per_subject[subject_id], key=lambda vocalic: vocalic.timestamp)
+            if read_earliest_timestamp:
+                earliest_timestamp = VocalicsReader._read_earliest_timestamp(connection, trial_id)
 
-        return vocalics_per_subject
+        return records, earliest_timestamp
+
+    @staticmethod
+    def _parse_timestamp(timestamp: str) -> datetime:
+        # Timestamps in the database format are parsed directly. Any other timestamp goes to the generic parser, which
+        # handles time zone offsets and keeps timestamps without time zone naive.
+        match = VocalicsReader.TIMESTAMP_REGEX.fullmatch(timestamp)
+        if match is None:
+            return parse(timestamp)
+
+        return datetime.strptime(match.group(1), VocalicsReader.TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+
+    @staticmethod
+    def _parse_timestamps(timestamps: List[str]) -> List[datetime]:
+        # Same rules as _parse_timestamp. If all the timestamps are in the database format, they are parsed at once
+        # with numpy. Otherwise, they are parsed one by one.
+        matches = [VocalicsReader.TIMESTAMP_REGEX.fullmatch(timestamp) for timestamp in timestamps]
+        if not all(matches):
+            return [VocalicsReader._parse_timestamp(timestamp) for timestamp in timestamps]
+
+        parsed_timestamps = np.array([match.group(1) for match in matches], dtype="datetime64[us]")
+        return [timestamp.replace(tzinfo=timezone.utc) for timestamp in parsed_timestamps.astype(object)]
+
+    def close(self) -> None:
+        """Close the connection to the database, if any. A new one is opened in the next read.
+
+        The connection is shared by all the readers of the same database in this process, so this also closes it for
+        them. They will open a new connection in their next read.
+        """
+        connection = VocalicsReader._connections.pop(self._get_connection_key(), None)
+        if connection is not None:
+            connection.close()
+
+    def _get_connection_key(self) -> Tuple[int, str, int, str]:
+        return os.getpid(), self._server, self._port, self._database
 
     def _connect(self) -> Any:
-        connection = None
+        key = self._get_connection_key()
+        connection = VocalicsReader._connections.get(key)
+        if connection is not None and not connection.closed:
+            return connection
+
         try:
             connection = psycopg2.connect(host=self._server,
                                           port=self._port,
@@ -102,20 +164,32 @@ class VocalicsReader:
             raise RuntimeError(
                 "Error while connecting to the database: " + str(error))
 
+        VocalicsReader._connections[key] = connection
+
         return connection
 
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _build_query(feature_names: Tuple[str, ...], between_timestamps: bool) -> str:
+        # The query only depends on the features and on whether it is restricted to an interval, so we build it once
+        # for each combination and reuse it across trials.
+        db_feature_list = ",".join(
+            [VocalicsReader.FEATURE_MAP[feature_name] for feature_name in feature_names])
+
+        query = f"SELECT participant, timestamp, {db_feature_list} FROM features WHERE trial_id = %s"
+        if between_timestamps:
+            query += " AND timestamp >= %s AND timestamp <= %s"
+
+        return query + " ORDER BY participant, timestamp"
+
     @staticmethod
     def _read_features_between_timestamps(connection: Any,
                                           trial_id: str,
+                                          feature_names: List[str],
                                           initial_timestamp: datetime,
-                                          final_timestamp: datetime,
-                                          feature_names: List[str]) -> List[Tuple[Any]]:
-
-        db_feature_list = ",".join(
-            [VocalicsReader.FEATURE_MAP[feature_name] for feature_name in feature_names])
+                                          final_timestamp: datetime) -> List[Tuple[Any]]:
 
-        query = f"SELECT participant, timestamp, {db_feature_list} FROM features WHERE trial_id = %s AND " + \
-                "timestamp >= %s AND timestamp <= %s ORDER BY participant, timestamp"
+        query = VocalicsReader._build_query(tuple(feature_names), True)
 
         # Transform isoformat of python into timestamp string to match database timestamp
         initial_timestamp_formatted = initial_timestamp.isoformat().ljust(
@@ -144,11 +218,7 @@ class VocalicsReader:
                        trial_id: str,
                        feature_names: List[str]) -> List[Tuple[Any]]:
 
-        db_feature_list = ",".join(
-            [VocalicsReader.FEATURE_MAP[feature_name] for feature_name in feature_names])
-
-        query = f"SELECT participant, timestamp, {db_feature_list} FROM features WHERE " + \
-                "trial_id = %s ORDER BY participant, timestamp"
+        query = VocalicsReader._build_query(tuple(feature_names), False)
 
         cursor = connection.cursor()
         cursor.execute(query, (trial_id,))
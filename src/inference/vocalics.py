@@ -1,14 +1,13 @@
+import math
 from typing import Any
 from typing import Callable
-from typing import Dict
-from typing import List
 from typing import Optional
+from typing import Tuple
 
 import numpy as np
 from tqdm import tqdm
 
-from scipy.stats import bernoulli
-from scipy.stats import norm, truncnorm
+from scipy.stats import truncnorm
 
 EPSILON = 1E-16
 
@@ -70,117 +69,127 @@ class DiscreteCoordinationInference:
 
     def __forward(self, m_comp2coord: np.ndarray):
         m_forward = np.zeros((self.mid_time_step + 1, 2))
-        for t in range(self.mid_time_step + 1):
-            # Transform to log scale for numerical stability
+        log_m_comp2coord = self.__get_log_messages_up_to_mid_time_step(m_comp2coord)
+        p = self.pc  # probability that coordination does not change
+        q = 1 - self.pc
 
+        # Transform to log scale for numerical stability. At t = 0, the contribution of the previous coordination
+        # sample is given by the prior.
+        m_forward[0] = np.log(np.array([1 - self.prior_c, self.prior_c], dtype=float) + EPSILON)
+        for t in range(self.mid_time_step + 1):
             # Contribution of the previous coordination sample to the marginal
-            if t == 0:
-                m_forward[t] = np.log(np.array([1 - self.prior_c, self.prior_c], dtype=float) + EPSILON)
-            else:
-                m_forward[t] = np.log(np.matmul(m_forward[t - 1], self.transition_matrix) + EPSILON)
+            if t > 0:
+                # Product with the transition matrix, which is symmetric with pc in the diagonal
+                f0, f1 = m_forward[t - 1]
+                m_forward[t, 0] = math.log(f0 * p + f1 * q + EPSILON)
+                m_forward[t, 1] = math.log(f0 * q + f1 * p + EPSILON)
 
             # Contribution of the components to the coordination marginal
-            if t == self.mid_time_step:
-                # All the components contributions after t = M
-                m_forward[t] += np.sum(np.log(m_comp2coord[t:]) + EPSILON, axis=0)
-            else:
-                m_forward[t] += np.log(m_comp2coord[t] + EPSILON)
+            m_forward[t] += log_m_comp2coord[t]
 
             # Message normalization
-            m_forward[t] -= np.max(m_forward[t])
-            m_forward[t] = np.exp(m_forward[t])
+            m_forward[t] = np.exp(m_forward[t] - np.max(m_forward[t]))
             m_forward[t] /= np.sum(m_forward[t])
 
         return m_forward
 
     def __backwards(self, m_comp2coord: np.ndarray):
         m_backwards = np.zeros((self.mid_time_step + 1, 2))
-        for t in range(self.mid_time_step, -1, -1):
-            # Transform to log scale for numerical stability
+        log_m_comp2coord = self.__get_log_messages_up_to_mid_time_step(m_comp2coord)
+        p = self.pc  # probability that coordination does not change
+        q = 1 - self.pc
 
+        # Transform to log scale for numerical stability. At t = M, there's no next coordination sample.
+        m_backwards[self.mid_time_step] = log_m_comp2coord[self.mid_time_step]
+        for t in range(self.mid_time_step, -1, -1):
             # Contribution of the next coordination sample to the marginal
-            if t == self.mid_time_step:
-                # All the components contributions after t = M
-                m_backwards[t] = np.sum(np.log(m_comp2coord[t:] + EPSILON), axis=0)
-            else:
-                m_backwards[t] = np.log(np.matmul(m_backwards[t + 1], self.transition_matrix) + EPSILON)
-                m_backwards[t] += np.log(m_comp2coord[t] + EPSILON)
+            if t < self.mid_time_step:
+                # Product with the transition matrix, which is symmetric with pc in the diagonal
+                b0, b1 = m_backwards[t + 1]
+                m_backwards[t, 0] = math.log(b0 * p + b1 * q + EPSILON)
+                m_backwards[t, 1] = math.log(b0 * q + b1 * p + EPSILON)
+                m_backwards[t] += log_m_comp2coord[t]
 
             # Message normalization
-            m_backwards[t] -= np.max(m_backwards[t])
-            m_backwards[t] = np.exp(m_backwards[t])
+            m_backwards[t] = np.exp(m_backwards[t] - np.max(m_backwards[t]))
             m_backwards[t] /= np.sum(m_backwards[t])
 
         return m_backwards
 
+    def __get_log_messages_up_to_mid_time_step(self, m_comp2coord: np.ndarray):
+        # Messages from the components in log scale. All the components contributions after t = M are combined at M.
+        # Their product can be very small, so instead of adding EPSILON, which would wipe out that evidence, we only
+        # floor zeros to the smallest positive float to avoid log(0).
+        log_m_comp2coord = np.log(m_comp2coord[:self.mid_time_step + 1] + EPSILON)
+        log_m_comp2coord[self.mid_time_step] = np.sum(
+            np.log(np.maximum(m_comp2coord[self.mid_time_step:], np.finfo(float).tiny)), axis=0)
+
+        return log_m_comp2coord
+
     def __get_messages_from_components_to_coordination(self):
-        def get_message_from_individual_component_to_coordination(current_value_main_series: np.ndarray,
-                                                                  previous_value_main_series: np.ndarray,
-                                                                  previous_value_other_series: np.ndarray,
-                                                                  prior_mean_main_series: np.ndarray,
-                                                                  prior_std_main_series: np.ndarray,
-                                                                  coupling_std: np.ndarray,
-                                                                  mask_main_series: int):
+        def get_messages_from_individual_component_to_coordination(main_series: np.ndarray,
+                                                                   previous_time_steps_main_series: np.ndarray,
+                                                                   other_series: np.ndarray,
+                                                                   previous_time_steps_other_series: np.ndarray,
+                                                                   prior_mean_main_series: np.ndarray,
+                                                                   prior_std_main_series: np.ndarray,
+                                                                   coupling_std: np.ndarray,
+                                                                   mask_main_series: np.ndarray):
+            # Previous value of the main series at each time step. The prior mean is used when there's none.
+            previous_values_main_series = np.where(previous_time_steps_main_series[:, None] >= 0,
+                                                   main_series[previous_time_steps_main_series],
+                                                   prior_mean_main_series)
+            previous_values_other_series = other_series[previous_time_steps_other_series]
+
             # This term will be 0.5 only if there are no observations for the component at the current time step.
             # We use it so that c_leaves = [0.5, 0.5] instead of [0, 0] in these cases for numerical stability
             # with vector operations later when passing the messages around.
             addition_factor = (1 - mask_main_series) * 0.5
-            prior_cdf = np.prod(
-                norm.pdf(current_value_main_series, loc=prior_mean_main_series, scale=prior_std_main_series))
-
-            if previous_value_other_series is None:
-                # Nothing can be inferred about coordination
-                c0 = 0.5
-                c1 = 0.5
-            else:
-                # For C_t = 0
-                c0 = addition_factor + mask_main_series * (prior_cdf if previous_value_main_series is None else np.prod(
-                    norm.pdf(
-                        current_value_main_series, loc=previous_value_main_series, scale=prior_std_main_series)))
-
-                # For C_t = 1
-                c1 = addition_factor + mask_main_series * np.prod(
-                    norm.pdf(current_value_main_series, loc=previous_value_other_series, scale=coupling_std))
-
-            if c0 <= EPSILON and c1 <= EPSILON:
-                c0 = 0.5
-                c1 = 0.5
-
-            return np.array([c0, c1])
-
-        last_ta = None  # last time step with observed value for the series A
-        last_tb = None  # last time step with observed value for the series B
-        m_comp2coord = np.zeros((self.time_steps, 2))
-        for t in range(self.time_steps):
-            previous_a = None if last_ta is None else self.series_a[:, last_ta]
-            previous_b = None if last_tb is None else self.series_b[:, last_tb]
-
-            # Message from A_t to C_t
-            m_comp2coord[t] = get_message_from_individual_component_to_coordination(self.series_a[:, t],
-                                                                                    previous_a,
-                                                                                    previous_b,
-                                                                                    self.mean_a,
-                                                                                    self.std_a,
-                                                                                    self.std_ab,
-                                                                                    self.mask_a[t])
-
-            # Message from B_t to C_t
-            m_comp2coord[t] *= get_message_from_individual_component_to_coordination(self.series_b[:, t],
-                                                                                     previous_b,
-                                                                                     previous_a,
-                                                                                     self.mean_b,
-                                                                                     self.std_b,
-                                                                                     self.std_ab,
-                                                                                     self.mask_b[t])
-
-            if self.mask_a[t] == 1:
-                last_ta = t
-            if self.mask_b[t] == 1:
-                last_tb = t
+
+            # For C_t = 0
+            c0 = addition_factor + mask_main_series * normal_product_pdf(main_series, previous_values_main_series,
+                                                                         prior_std_main_series)
+            # For C_t = 1
+            c1 = addition_factor + mask_main_series * normal_product_pdf(main_series, previous_values_other_series,
+                                                                         coupling_std)
+
+            # Nothing can be inferred about coordination if there's no previous value of the other series
+            uninformative = (previous_time_steps_other_series < 0) | ((c0 <= EPSILON) & (c1 <= EPSILON))
+
+            return np.where(uninformative[:, None], 0.5, np.stack([c0, c1], axis=-1))
+
+        mask_a = np.asarray(self.mask_a)
+        mask_b = np.asarray(self.mask_b)
+
+        # Last time step before t with observed value for the series A and B. -1 if there's none.
+        time_steps = np.arange(self.time_steps)
+        last_ta = np.maximum.accumulate(np.where(mask_a == 1, time_steps, -1))
+        last_tb = np.maximum.accumulate(np.where(mask_b == 1, time_steps, -1))
+        previous_ta = np.concatenate([[-1], last_ta[:-1]])
+        previous_tb = np.concatenate([[-1], last_tb[:-1]])
+
+        # Messages from A_t and B_t to C_t
+        m_comp2coord = get_messages_from_individual_component_to_coordination(self.series_a.T, previous_ta,
+                                                                              self.series_b.T, previous_tb,
+                                                                              self.mean_a, self.std_a, self.std_ab,
+                                                                              mask_a)
+        m_comp2coord *= get_messages_from_individual_component_to_coordination(self.series_b.T, previous_tb,
+                                                                               self.series_a.T, previous_ta,
+                                                                               self.mean_b, self.std_b, self.std_ab,
+                                                                               mask_b)
 
         return m_comp2coord
 
 
+def normal_product_pdf(x: np.ndarray, loc: Any, scale: Any) -> np.ndarray:
+    """
+    Product of independent normal densities over the last axis of x, evaluated in log-space.
+    """
+    z = (x - loc) / scale
+    log_pdf = -0.5 * z * z - np.log(scale) - 0.5 * np.log(2 * np.pi)
+    return np.exp(np.sum(log_pdf, axis=-1))
+
+
 def estimate_discrete_coordination(series_a: np.ndarray, series_b: np.ndarray, prior_c: float,
                                    transition_p: float, pa: Callable, pb: Callable, mask_a: Any,
                                    mask_b: Any) -> np.ndarray:
@@ -282,10 +291,14 @@ def estimate_continuous_coordination(gibbs_steps: int, series_a: np.ndarray, ser
     c_samples = np.zeros((gibbs_steps, T + 1))
 
     # Initialization
+    # The last observed values of the series are carried forward to the time steps with no observation. This is done
+    # with a single gather before the sampling loop, so the series passed by the caller are not modified.
+    time_steps = np.arange(T)
+    last_as = series_a[np.maximum.accumulate(np.where(np.asarray(mask_a) == 1, time_steps, 0))]
+    last_bs = series_b[np.maximum.accumulate(np.where(np.asarray(mask_b) == 1, time_steps, 0))]
+
     mask_ab = np.ones(T)
     mask_ba = np.ones(T)
-    last_as = series_a
-    last_bs = series_b
     observed_a = False
     observed_b = False
     for t in range(T):
@@ -293,8 +306,6 @@ def estimate_continuous_coordination(gibbs_steps: int, series_a: np.ndarray, ser
             mean = c_samples[0, t - 1]
             std = 0.1
             c_samples[0, t] = truncnorm.rvs((0 - mean) / std, (1 - mean) / std, loc=mean, scale=std)
-            last_as[t] = mask_a[t] * last_as[t] + (1 - mask_a[t]) * last_as[t - 1]
-            last_bs[t] = mask_b[t] * last_bs[t] + (1 - mask_b[t]) * last_bs[t - 1]
 
         if not observed_a or (observed_a and mask_b[t] == 0):
             mask_ab[t] = 0
@@ -305,41 +316,39 @@ def estimate_continuous_coordination(gibbs_steps: int, series_a: np.ndarray, ser
         if not observed_b:
             observed_b = mask_b[t] == 1
 
-    # MCMC
-    for s in tqdm(range(gibbs_steps)):
-        # Sample even coordination
+    # Neither the variances nor the contribution of the vocalics to the means depend on the coordination samples, so
+    # they are computed once for the even and odd time steps instead of at every gibbs step.
+    def get_posterior_terms(indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         variances = (2 + np.sum(
-            mask_ba[even_indices][:, np.newaxis] * (mean_a - last_bs[even_indices - 1] - mean_shift_coupling) ** 2 +
-            mask_ab[even_indices][:, np.newaxis] * (mean_b - last_as[even_indices - 1] - mean_shift_coupling) ** 2,
+            mask_ba[indices][:, np.newaxis] * (mean_a - last_bs[indices - 1] - mean_shift_coupling) ** 2 +
+            mask_ab[indices][:, np.newaxis] * (mean_b - last_as[indices - 1] - mean_shift_coupling) ** 2,
             axis=1))
         variances[-1] -= 1  # The last time step only counts the previous coordination value
         variances = 1 / variances
-        means = (np.sum(
-            mask_ba[even_indices][:, np.newaxis] * (mean_a - last_bs[even_indices - 1] - mean_shift_coupling) * (
-                    mean_a - series_a[even_indices]) +
-            mask_ab[even_indices][:, np.newaxis] * (mean_b - last_as[even_indices - 1] - mean_shift_coupling) * (
-                    mean_b - series_b[even_indices]), axis=1) +
-                 c_samples[s, even_indices - 1] + c_samples[s, even_indices + 1]) * variances
+        vocalics_means = np.sum(
+            mask_ba[indices][:, np.newaxis] * (mean_a - last_bs[indices - 1] - mean_shift_coupling) * (
+                    mean_a - series_a[indices]) +
+            mask_ab[indices][:, np.newaxis] * (mean_b - last_as[indices - 1] - mean_shift_coupling) * (
+                    mean_b - series_b[indices]), axis=1)
 
-        stds = np.sqrt(variances)
-        c_samples[s, even_indices] = truncnorm.rvs((0 - means) / stds, (1 - means) / stds, loc=means, scale=stds)
+        return variances, vocalics_means
+
+    even_variances, even_vocalics_means = get_posterior_terms(even_indices)
+    even_stds = np.sqrt(even_variances)
+    odd_variances, odd_vocalics_means = get_posterior_terms(odd_indices)
+    odd_stds = np.sqrt(odd_variances)
+
+    # MCMC
+    for s in tqdm(range(gibbs_steps)):
+        # Sample even coordination
+        means = (even_vocalics_means + c_samples[s, even_indices - 1] + c_samples[s, even_indices + 1]) * even_variances
+        c_samples[s, even_indices] = truncnorm.rvs((0 - means) / even_stds, (1 - means) / even_stds, loc=means,
+                                                   scale=even_stds)
 
         # Sample odd coordination
-        variances = (2 + np.sum(
-            mask_ba[odd_indices][:, np.newaxis] * (mean_a - last_bs[odd_indices - 1] - mean_shift_coupling) ** 2 +
-            mask_ab[odd_indices][:, np.newaxis] * (mean_b - last_as[odd_indices - 1] - mean_shift_coupling) ** 2,
-            axis=1))
-        variances[-1] -= 1  # The last time step only counts the previous coordination value
-        variances = 1 / variances
-        means = (np.sum(
-            mask_ba[odd_indices][:, np.newaxis] * (mean_a - last_bs[odd_indices - 1] - mean_shift_coupling) * (
-                    mean_a - series_a[odd_indices]) +
-            mask_ab[odd_indices][:, np.newaxis] * (mean_b - last_as[odd_indices - 1] - mean_shift_coupling) * (
-                    mean_b - series_b[odd_indices]), axis=1) +
-                 c_samples[s, odd_indices] + c_samples[s, odd_indices + 1]) * variances
-
-        stds = np.sqrt(variances)
-        c_samples[s, odd_indices] = truncnorm.rvs((0 - means) / stds, (1 - means) / stds, loc=means, scale=stds)
+        means = (odd_vocalics_means + c_samples[s, odd_indices] + c_samples[s, odd_indices + 1]) * odd_variances
+        c_samples[s, odd_indices] = truncnorm.rvs((0 - means) / odd_stds, (1 - means) / odd_stds, loc=means,
+                                                  scale=odd_stds)
 
         if s < gibbs_steps - 1:
             c_samples[s + 1] = c_samples[s]
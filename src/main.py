@@ -1,20 +1,8 @@
-from src.trial import Trial
-from src.components.speech.vocalics_aggregator import VocalicsAggregator
-from src.components.speech.vocalics_writer import VocalicsWriter
-
 if __name__ == "__main__":
-    # trial = Trial()
-    # trial.parse("../data/asist/study2/metadata/.metadata")
-    #
-    # aggregator = VocalicsAggregator(trial.utterances_per_subject)
-    # component = aggregator.split_with_current_utterance_truncation()
-    # VocalicsWriter().write("../data/asist/study2/evidence", component, trial.start, 1/1000)
-
-    import matplotlib.pyplot as plt
     import random
     import numpy as np
-    from scipy.stats import norm, multivariate_normal
-    from typing import Any, Dict, List
+    from scipy.stats import multivariate_normal
+    from typing import Any
 
     # Custom code
     from src.synthetic.coordination_generator import ContinuousCoordinationGenerator
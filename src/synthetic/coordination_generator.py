@@ -1,5 +1,6 @@
-from typing import Any, Callable, Dict, List, Tuple
-from scipy.stats import bernoulli, truncnorm
+from typing import List
+from scipy.stats import truncnorm
+import numpy as np
 
 
 class CoordinationGenerator:
@@ -23,6 +24,18 @@ class CoordinationGenerator:
     def _sample_from_transition(self, previous_c: float) -> float:
         raise Exception("Not implemented in this class.")
 
+    def _generate_binary_evidence(self, time_steps: int, p_flip: float) -> List[float]:
+        # The state is flipped with probability p_flip at each transition, so coordination at each time step is given by
+        # the parity of the number of flips so far. This lets us sample all the transitions at once instead of one per
+        # time step.
+        if time_steps == 0:
+            return []
+
+        initial_c = self._sample_from_prior()
+        flips = np.random.binomial(1, p_flip, size=time_steps - 1)
+
+        return (np.cumsum(np.concatenate([[initial_c], flips])) % 2).tolist()
+
 
 class DiscreteCoordinationGeneratorASIST(CoordinationGenerator):
     """
@@ -33,16 +46,12 @@ class DiscreteCoordinationGeneratorASIST(CoordinationGenerator):
         self.__p_prior = p_prior
         self.__pc = pc
 
-    def _sample_from_prior(self) -> float:
-        return bernoulli.rvs(self.__p_prior)
+    def generate_evidence(self, time_steps: int) -> List[float]:
+        # The state is repeated with probability pc
+        return self._generate_binary_evidence(time_steps, 1 - self.__pc)
 
-    def _sample_from_transition(self, previous_c: float) -> float:
-        if bernoulli.rvs(self.__pc) == 1:
-            # Repeat the state
-            return previous_c
-        else:
-            # Flip the state
-            return 1 - previous_c
+    def _sample_from_prior(self) -> float:
+        return np.random.binomial(1, self.__p_prior)
 
 
 class DiscreteCoordinationGenerator(CoordinationGenerator):
@@ -54,16 +63,12 @@ class DiscreteCoordinationGenerator(CoordinationGenerator):
         self._p_prior = p_prior
         self._p_transition = p_transition
 
-    def _sample_from_prior(self) -> float:
-        return bernoulli.rvs(self._p_prior)
+    def generate_evidence(self, time_steps: int) -> List[float]:
+        # The state is flipped with probability p_transition
+        return self._generate_binary_evidence(time_steps, self._p_transition)
 
-    def _sample_from_transition(self, previous_c: float) -> float:
-        if bernoulli.rvs(self._p_transition) == 1:
-            # Flip the state
-            return 1 - previous_c
-        else:
-            # Repeat the state
-            return previous_c
+    def _sample_from_prior(self) -> float:
+        return np.random.binomial(1, self._p_prior)
 
 
 class ContinuousCoordinationGenerator(CoordinationGenerator):
@@ -1,5 +1,4 @@
 from typing import Dict, List, Tuple
-from scipy.stats import norm
 import random
 import numpy as np
 
@@ -85,27 +84,27 @@ class VocalicsGeneratorForDiscreteCoordinationASIST(VocalicsGenerator):
 
     def _sample_a(self, feature_name: str, previous_a: float, previous_b: float, coordination: float):
         def sample_from_prior():
-            return norm.rvs(loc=self._mean_prior, scale=self._std_prior)
+            return np.random.normal(self._mean_prior, self._std_prior)
 
         if previous_b is None:
             return sample_from_prior()
         else:
             if int(coordination) == 0:
-                return sample_from_prior() if previous_a is None else norm.rvs(loc=previous_a, scale=self._std_prior)
+                return sample_from_prior() if previous_a is None else np.random.normal(previous_a, self._std_prior)
             else:
-                return norm.rvs(loc=previous_b, scale=np.sqrt(self._var_coupled))
+                return np.random.normal(previous_b, np.sqrt(self._var_coupled))
 
     def _sample_b(self, feature_name: str, previous_b: float, previous_a: float, coordination: float):
         def sample_from_prior():
-            return norm.rvs(loc=self._mean_prior, scale=self._std_prior)
+            return np.random.normal(self._mean_prior, self._std_prior)
 
         if previous_a is None:
             return sample_from_prior()
         else:
             if int(coordination) == 0:
-                return sample_from_prior() if previous_b is None else norm.rvs(loc=previous_b, scale=self._std_prior)
+                return sample_from_prior() if previous_b is None else np.random.normal(previous_b, self._std_prior)
             else:
-                return norm.rvs(loc=previous_a, scale=np.sqrt(self._var_coupled))
+                return np.random.normal(previous_a, np.sqrt(self._var_coupled))
 
 
 class VocalicsGeneratorForDiscreteCoordination(VocalicsGenerator):
@@ -120,7 +119,7 @@ class VocalicsGeneratorForDiscreteCoordination(VocalicsGenerator):
 
     def _sample_a(self, feature_name: str, previous_a: float, previous_b: float, coordination: float):
         def sample_from_prior():
-            return norm.rvs(loc=self._mean_prior, scale=self._std_prior)
+            return np.random.normal(self._mean_prior, self._std_prior)
 
         if previous_b is None:
             return sample_from_prior()
@@ -128,11 +127,11 @@ class VocalicsGeneratorForDiscreteCoordination(VocalicsGenerator):
             if int(coordination) == 0:
                 return sample_from_prior()
             else:
-                return norm.rvs(loc=previous_b + self._mean_shift_coupled, scale=self._var_coupled)
+                return np.random.normal(previous_b + self._mean_shift_coupled, self._var_coupled)
 
     def _sample_b(self, feature_name: str, previous_b: float, previous_a: float, coordination: float):
         def sample_from_prior():
-            return norm.rvs(loc=self._mean_prior, scale=self._std_prior)
+            return np.random.normal(self._mean_prior, self._std_prior)
 
         if previous_a is None:
             return sample_from_prior()
@@ -140,7 +139,7 @@ class VocalicsGeneratorForDiscreteCoordination(VocalicsGenerator):
             if int(coordination) == 0:
                 return sample_from_prior()
             else:
-                return norm.rvs(loc=previous_a + self._mean_shift_coupled, scale=self._var_coupled)
+                return np.random.normal(previous_a + self._mean_shift_coupled, self._var_coupled)
 
 
 class VocalicsGeneratorForContinuousCoordination(VocalicsGenerator):
@@ -155,20 +154,20 @@ class VocalicsGeneratorForContinuousCoordination(VocalicsGenerator):
 
     def _sample_a(self, feature_name: str, previous_a: float, previous_b: float, coordination: float):
         def sample_from_prior():
-            return norm.rvs(loc=self._mean_prior, scale=self._std_prior)
+            return np.random.normal(self._mean_prior, self._std_prior)
 
         if previous_b is None:
             return sample_from_prior()
         else:
             mean = (1 - coordination) * self._mean_prior + coordination * (previous_b + self._mean_shift_coupled)
-            return norm.rvs(loc=mean, scale=self._var_coupled)
+            return np.random.normal(mean, self._var_coupled)
 
     def _sample_b(self, feature_name: str, previous_b: float, previous_a: float, coordination: float):
         def sample_from_prior():
-            return norm.rvs(loc=self._mean_prior, scale=self._std_prior)
+            return np.random.normal(self._mean_prior, self._std_prior)
 
         if previous_a is None:
             return sample_from_prior()
         else:
             mean = (1 - coordination) * self._mean_prior + coordination * (previous_a + self._mean_shift_coupled)
-            return norm.rvs(loc=mean, scale=self._var_coupled)
+            return np.random.normal(mean, self._var_coupled)
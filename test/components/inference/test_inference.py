@@ -2,11 +2,18 @@ import unittest
 from unittest.mock import MagicMock
 
 import numpy as np
-from scipy.stats import norm
 
 from src.inference.vocalics import DiscreteCoordinationInference
 
 
+def joint_pdf(x: np.ndarray, loc: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """
+    Product of independent normal densities over the last axis, accumulated in log-space.
+    """
+    z = (x - loc) / scale
+    return np.exp(np.sum(-0.5 * z * z - np.log(scale * np.sqrt(2 * np.pi)), axis=-1))
+
+
 class DiscreteCoordinationParameters:
     # [WARN] Changing these values will break the tests
     series_a = np.array([[0.2, 0.4, 0, 0.5, 0, 0.6],
@@ -36,52 +43,38 @@ class TestDiscreteCoordinationInference(unittest.TestCase):
                                                          self.params.std_a, self.params.mean_b, self.params.std_b,
                                                          self.params.std_ab, self.params.mask_a, self.params.mask_b)
 
-        T = self.params.series_a.shape[1]
-
-        m_a2coord_expected = np.zeros((T, 2))
-        m_b2coord_expected = np.zeros((T, 2))
-
-        # t = 0
-        m_a2coord_expected[0, 0] = 0.5  # No previous value of B at this time step
-        m_a2coord_expected[0, 1] = 0.5
-
-        m_b2coord_expected[0, 0] = 0.5  # No observation for B at this time step
-        m_b2coord_expected[0, 1] = 0.5
-
-        # t = 1
-        m_a2coord_expected[1, 0] = 0.5  # No previous value of B at this time step
-        m_a2coord_expected[1, 1] = 0.5
-
-        m_b2coord_expected[1, 0] = np.prod(norm.pdf([0.1, 0.3], loc=self.params.mean_b, scale=self.params.std_b))
-        m_b2coord_expected[1, 1] = np.prod(norm.pdf([0.1, 0.3], loc=[0.2, 0.3], scale=self.params.std_ab))
-
-        # t = 2
-        m_a2coord_expected[2, 0] = 0.5  # No observation for A at this time step
-        m_a2coord_expected[2, 1] = 0.5
-
-        m_b2coord_expected[2, 0] = np.prod(norm.pdf([0.3, 0.4], loc=[0.1, 0.3], scale=self.params.std_b))
-        m_b2coord_expected[2, 1] = np.prod(norm.pdf([0.3, 0.4], loc=[0.4, 0.2], scale=self.params.std_ab))
-
-        # t = 3 = M
-        m_a2coord_expected[3, 0] = np.prod(norm.pdf([0.5, 0.1], loc=[0.4, 0.2], scale=self.params.std_a))
-        m_a2coord_expected[3, 1] = np.prod(norm.pdf([0.5, 0.1], loc=[0.3, 0.4], scale=self.params.std_ab))
-
-        m_b2coord_expected[3, 0] = 0.5  # No observation for B at this time step
-        m_b2coord_expected[3, 1] = 0.5
-
-        # t = 4
-        m_a2coord_expected[4, 0] = 0.5  # No observation for A at this time step
-        m_a2coord_expected[4, 1] = 0.5
-
-        m_b2coord_expected[4, 0] = 0.5  # No observation for B at this time step
-        m_b2coord_expected[4, 1] = 0.5
-
-        # t = 5
-        m_a2coord_expected[5, 0] = np.prod(norm.pdf([0.6, 0.7], loc=[0.5, 0.1], scale=self.params.std_a))
-        m_a2coord_expected[5, 1] = np.prod(norm.pdf([0.6, 0.7], loc=[0.3, 0.4], scale=self.params.std_ab))
-
-        m_b2coord_expected[5, 0] = np.prod(norm.pdf([0.8, 0.9], loc=[0.3, 0.4], scale=self.params.std_b))
-        m_b2coord_expected[5, 1] = np.prod(norm.pdf([0.8, 0.9], loc=[0.5, 0.1], scale=self.params.std_ab))
+        # Time steps in which the messages are uninformative about coordination, i.e., [0.5, 0.5]. That is the case
+        # when there's no observation for the series or no previous value of the other series.
+        uninformative_a = np.array([True,  # t = 0: No previous value of B at this time step
+                                    True,  # t = 1: No previous value of B at this time step
+                                    True,  # t = 2: No observation for A at this time step
+                                    False,  # t = 3 = M
+                                    True,  # t = 4: No observation for A at this time step
+                                    False])  # t = 5
+        uninformative_b = np.array([True,  # t = 0: No observation for B at this time step
+                                    False,  # t = 1: No previous value of B, so the prior mean is used
+                                    False,  # t = 2
+                                    True,  # t = 3 = M: No observation for B at this time step
+                                    True,  # t = 4: No observation for B at this time step
+                                    False])  # t = 5
+
+        # Means of the distributions of A and B at each time step when there's no coordination (same) and when there is
+        # coordination (other). Values at uninformative time steps are not used.
+        unused = [0, 0]
+        loc_a_same = np.array([unused, unused, unused, [0.4, 0.2], unused, [0.5, 0.1]])
+        loc_a_other = np.array([unused, unused, unused, [0.3, 0.4], unused, [0.3, 0.4]])
+        loc_b_same = np.array([unused, self.params.mean_b, [0.1, 0.3], unused, unused, [0.3, 0.4]])
+        loc_b_other = np.array([unused, [0.2, 0.3], [0.4, 0.2], unused, unused, [0.5, 0.1]])
+
+        # Evaluate the densities of all the time steps at once
+        obs_a = self.params.series_a.T
+        obs_b = self.params.series_b.T
+        m_a2coord_expected = np.where(uninformative_a[:, None], 0.5,
+                                      np.stack([joint_pdf(obs_a, loc_a_same, self.params.std_a),
+                                                joint_pdf(obs_a, loc_a_other, self.params.std_ab)], axis=-1))
+        m_b2coord_expected = np.where(uninformative_b[:, None], 0.5,
+                                      np.stack([joint_pdf(obs_b, loc_b_same, self.params.std_b),
+                                                joint_pdf(obs_b, loc_b_other, self.params.std_ab)], axis=-1))
 
         # Message from components to coordination
         m_comp2coord_expected = m_a2coord_expected * m_b2coord_expected
@@ -89,6 +82,15 @@ class TestDiscreteCoordinationInference(unittest.TestCase):
 
         np.testing.assert_allclose(m_comp2coord_expected, m_comp2coord_actual, atol=1e-5)
 
+        # Reference values computed with scipy.stats.norm.pdf, independently of joint_pdf
+        m_comp2coord_reference = np.array([[0.25, 0.25],
+                                           [0.0756964325, 0.0791805773],
+                                           [0.0776126968, 0.0776126968],
+                                           [0.0787856625, 0.0745694594],
+                                           [0.25, 0.25],
+                                           [0.0163954055, 0.0160707548]])
+        np.testing.assert_allclose(m_comp2coord_reference, m_comp2coord_actual, atol=1e-8)
+
     def test_forward_messages(self):
         inference_engine = DiscreteCoordinationInference(self.params.series_a, self.params.series_b,
                                                          self.params.prior_c, self.params.pc, self.params.mean_a,
@@ -258,6 +260,26 @@ class TestDiscreteCoordinationInference(unittest.TestCase):
 
         np.testing.assert_allclose(m_marginals_expected, m_marginals_actual, atol=1e-5)
 
+    def test_marginals_with_vanishing_messages(self):
+        inference_engine = DiscreteCoordinationInference(self.params.series_a, self.params.series_b,
+                                                         self.params.prior_c, self.params.pc, self.params.mean_a,
+                                                         self.params.std_a, self.params.mean_b, self.params.std_b,
+                                                         self.params.std_ab, self.params.mask_a, self.params.mask_b)
+
+        # Messages after t = M are zero or below EPSILON but still favor C = 1
+        inference_engine._DiscreteCoordinationInference__get_messages_from_components_to_coordination = MagicMock(
+            return_value=np.array([[0.5, 0.5],
+                                   [0.5, 0.5],
+                                   [0.5, 0.5],
+                                   [0.5, 0.5],
+                                   [0, 0],
+                                   [1e-30, 1e-20]]))
+
+        m_marginals_actual = inference_engine.estimate_marginals()
+
+        self.assertTrue(np.all(np.isfinite(m_marginals_actual)))
+        np.testing.assert_allclose([0, 1], m_marginals_actual[-1], atol=1e-5)
+
 
 if __name__ == '__main__':
     unittest.main()
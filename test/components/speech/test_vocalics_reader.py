@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+
+from src.components.speech.vocalics_reader import VocalicsReader
+
+
+def test_parse_timestamp_in_database_format():
+    timestamp = VocalicsReader._parse_timestamp("2022-03-29T16:07:52.123456789Z")
+
+    assert timestamp == datetime(2022, 3, 29, 16, 7, 52, 123456, tzinfo=timezone.utc)
+
+
+def test_parse_timestamp_with_offset():
+    timestamp = VocalicsReader._parse_timestamp("2022-03-29T16:07:52.123456-05:00")
+
+    assert timestamp.utcoffset() == timedelta(hours=-5)
+    assert timestamp == datetime(2022, 3, 29, 21, 7, 52, 123456, tzinfo=timezone.utc)
+
+
+def test_parse_timestamp_without_time_zone():
+    timestamp = VocalicsReader._parse_timestamp("2022-03-29T16:07:52.123456")
+
+    assert timestamp == datetime(2022, 3, 29, 16, 7, 52, 123456)
+    assert timestamp.tzinfo is None
+
+
+def test_parse_timestamps_matches_single_parse():
+    database_timestamps = ["2022-03-29T16:07:52.123456789Z", "2022-03-29T16:07:53.1Z"]
+    mixed_timestamps = database_timestamps + ["2022-03-29T16:07:52.123456-05:00", "2022-03-29T16:07:52.123456"]
+
+    for timestamps in [database_timestamps, mixed_timestamps]:
+        parsed_timestamps = VocalicsReader._parse_timestamps(timestamps)
+
+        assert parsed_timestamps == [VocalicsReader._parse_timestamp(timestamp) for timestamp in timestamps]
+        assert [timestamp.utcoffset() for timestamp in parsed_timestamps] == \
+               [VocalicsReader._parse_timestamp(timestamp).utcoffset() for timestamp in timestamps]
+
+
+def test_read_offsets_vocalics_to_start_timestamp():
+    records = [("subject", "2022-03-29T16:07:52.5-05:00", 100, 0.1),
+               ("subject", "2022-03-29T16:07:53-05:00", 110, 0.2)]
+    earliest_timestamp = "2022-03-29T16:07:52-05:00"
+
+    connection = MagicMock()
+    connection.__enter__.return_value = connection
+    connection.cursor.return_value.fetchall.side_effect = [records, [(earliest_timestamp,)]]
+
+    reader = VocalicsReader()
+    reader._connect = MagicMock(return_value=connection)
+
+    start_timestamp = datetime(2022, 3, 29, 21, 0, 0, tzinfo=timezone.utc)
+    vocalics = reader.read("trial", ["pitch", "intensity"], start_timestamp=start_timestamp)["subject"]
+
+    assert [vocalic.timestamp for vocalic in vocalics] == [start_timestamp + timedelta(seconds=0.5),
+                                                            start_timestamp + timedelta(seconds=1)]
+    assert [vocalic.features for vocalic in vocalics] == [{"pitch": 100, "intensity": 0.1},
+                                                          {"pitch": 110, "intensity": 0.2}]
+
+
+def _mock_connection(records=None) -> MagicMock:
+    connection = MagicMock(closed=0)
+    connection.__enter__.return_value = connection
+    connection.cursor.return_value.fetchall.return_value = records
+    return connection
+
+
+def test_read_reconnects_when_connection_is_dropped():
+    VocalicsReader._connections.clear()
+
+    dropped_connection = _mock_connection()
+    dropped_connection.cursor.return_value.execute.side_effect = psycopg2.OperationalError("server closed connection")
+    new_connection = _mock_connection([("subject", "2022-03-29T16:07:52.5Z", 100)])
+
+    with patch("src.components.speech.vocalics_reader.psycopg2.connect",
+               side_effect=[dropped_connection, new_connection]) as connect:
+        reader = VocalicsReader()
+        reader._connect()
+
+        assert len(reader.read("trial", ["pitch"])["subject"]) == 1
+        assert len(reader.read("trial", ["pitch"])["subject"]) == 1
+
+    assert connect.call_count == 2
+    dropped_connection.close.assert_called_once()
+    VocalicsReader._connections.clear()
+
+
+def test_connections_are_not_shared_across_processes():
+    VocalicsReader._connections.clear()
+
+    with patch("src.components.speech.vocalics_reader.psycopg2.connect",
+               side_effect=[_mock_connection(), _mock_connection()]):
+        reader = VocalicsReader()
+        parent_connection = reader._connect()
+        assert VocalicsReader()._connect() is parent_connection
+
+        with patch("src.components.speech.vocalics_reader.os.getpid", return_value=-1):
+            assert reader._connect() is not parent_connection
+
+    VocalicsReader._connections.clear()